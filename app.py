@@ -5,12 +5,22 @@ import os
 import sys
 import time
 import threading
+import math
+import bisect
+from collections import OrderedDict
+from functools import wraps
 from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
+from werkzeug.middleware.proxy_fix import ProxyFix
 from datetime import timedelta, datetime
 import logging
 import atexit
 
 app = Flask(__name__)
+# Number of proxies in front of the app (Render has one). Only then is the
+# X-Forwarded-For entry they append trusted as the client address.
+TRUSTED_PROXIES = int(os.environ.get('TRUSTED_PROXIES', 0))
+if TRUSTED_PROXIES:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXIES)
 app.secret_key = os.environ.get('SECRET_KEY', 'your-secret-key-change-this')
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=24)
 
@@ -18,12 +28,18 @@ app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=24)
 ADMIN_USERNAME = os.environ.get('ADMIN_USERNAME', 'admin')
 ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD', 'admin123')
 
+# API keys that get their own rate-limit bucket (comma-separated)
+PUBLIC_API_KEYS = {key.strip() for key in os.environ.get('PUBLIC_API_KEYS', '').split(',') if key.strip()}
+
 # === DATABASE CONFIGURATION ===
 DATABASE_PATH = os.environ.get('DATABASE_PATH', 'leaderboard.db')
+# Online backups are written here; it should be on storage that outlives DATABASE_PATH
+BACKUP_PATH = os.environ.get('BACKUP_PATH')
 
 # === CACHING SYSTEM ===
 leaderboard_cache = {
     'data': None,
+    'by_name': {},  # name -> leaderboard entry, rebuilt alongside 'data'
     'timestamp': None,
     'lock': threading.Lock(),
     'ttl': 30  # 30 seconds cache TTL for real-time updates
@@ -36,6 +52,47 @@ api_rate_limiter = {
     'lock': threading.Lock()
 }
 
+# Per-client token buckets for public endpoints (LRU-evicted)
+client_rate_limiter = {
+    'capacity': int(os.environ.get('PUBLIC_RATE_BURST', 20)),  # Burst size per client
+    'refill_rate': float(os.environ.get('PUBLIC_RATE_LIMIT', 2)),  # Tokens per second per client
+    'max_clients': 10000,  # Least recently seen clients are evicted beyond this
+    'buckets': OrderedDict(),  # client key -> [tokens, last_refill]
+    'lock': threading.Lock()
+}
+
+# Load shedding for public endpoints
+load_shedding = {
+    'max_inflight': 16,  # Above this, serve the cached snapshot without touching the DB
+    'inflight': 0,
+    'retry_after': 5,  # Seconds clients should wait when nothing can be served
+    'lock': threading.Lock()
+}
+
+# In-memory player name index for admin search
+player_search_index = {
+    'sorted_keys': [],  # Sorted (lowercase name, name) pairs for prefix lookups
+    'grams': {},  # Trigram -> set of names for fuzzy/substring lookups
+    'ready': False,
+    'lock': threading.Lock()
+}
+
+# Background database maintenance, run only in quiet periods
+maintenance_control = {
+    'quiet_period': 30,  # Seconds without writes or in-flight requests before maintenance runs
+    'check_interval': 10,  # Seconds between maintenance checks
+    'backup_interval': 300,  # Online backup every 5 minutes
+    'backup_pages': 64,  # Pages copied per backup step
+    'backup_sleep': 0.05,  # Seconds to pause after each backup step
+    'checkpoint_interval': 60,  # Passive WAL checkpoint every minute
+    'analyze_interval': 3600,  # Bounded ANALYZE every hour
+    'vacuum_interval': 3600,  # Incremental vacuum every hour
+    'vacuum_pages': 256,  # Pages reclaimed per incremental vacuum
+    'last_write': 0,
+    'last_run': {},  # task name -> time it last completed
+    'lock': threading.Lock()
+}
+
 # Sync control
 sync_control = {
     'enabled': True,
@@ -47,6 +104,14 @@ sync_control = {
 def initialize_database():
     """Initialize SQLite database with players table"""
     conn = sqlite3.connect(DATABASE_PATH, check_same_thread=False)
+    # WAL lets readers continue during writes, backups and checkpoints.
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("PRAGMA journal_mode = WAL")
+    # auto_vacuum only takes effect on a new database. Older ones need one
+    # full VACUUM, done here at startup before any request can wait on it.
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        print("Converting database to incremental auto-vacuum...")
+        conn.execute("VACUUM")
     conn.execute('''
         CREATE TABLE IF NOT EXISTS players (
             name TEXT PRIMARY KEY,
@@ -57,9 +122,230 @@ def initialize_database():
     conn.execute('''
         CREATE INDEX IF NOT EXISTS idx_score ON players(score DESC)
     ''')
+    # Score history: one row per player per second, clustered by player and time
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS score_events (
+            player TEXT NOT NULL,
+            ts INTEGER NOT NULL,
+            score INTEGER NOT NULL,
+            PRIMARY KEY (player, ts)
+        ) WITHOUT ROWID
+    ''')
+    # Pre-aggregated history buckets for long ranges (see HISTORY_ROLLUPS).
+    # Ranks are filled in by the rank sampler, not by score updates.
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS score_rollups (
+            player TEXT NOT NULL,
+            resolution INTEGER NOT NULL,
+            bucket INTEGER NOT NULL,
+            score_min INTEGER NOT NULL,
+            score_max INTEGER NOT NULL,
+            score_last INTEGER NOT NULL,
+            last_ts INTEGER NOT NULL,
+            rank_best INTEGER,
+            rank_last INTEGER,
+            PRIMARY KEY (player, resolution, bucket)
+        ) WITHOUT ROWID
+    ''')
+    # One marker per leaderboard reset; history reads treat it as every score dropping to 0
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS leaderboard_resets (
+            ts INTEGER PRIMARY KEY
+        )
+    ''')
     conn.commit()
     return conn
 
+# === SCORE HISTORY ===
+
+# Rollup resolutions in seconds, keyed by the name used in the history API
+HISTORY_ROLLUPS = {
+    'minute': 60,
+    'hour': 3600,
+    'day': 86400
+}
+HISTORY_MAX_POINTS = 500  # Upper bound on points returned per history query
+
+# Periodic rank sampling into the rollups, off the request path
+rank_sampler = {
+    'interval': 60,  # Seconds between samples
+    'chunk_size': 500,  # Players written per transaction
+    'last': None  # name -> rank at the last sample; only changes are written
+}
+
+def record_score_event(conn, player_name):
+    """Append the player's current score to history and its rollups.
+
+    Runs inside the caller's transaction and writes a fixed number of rows,
+    whatever the size of the roster. Ranks are sampled separately.
+    """
+    row = conn.execute("SELECT score FROM players WHERE name = ?", (player_name,)).fetchone()
+    if row is None:
+        return
+    score = int(row[0] or 0)
+    ts = int(time.time())
+
+    conn.execute(
+        "INSERT OR REPLACE INTO score_events (player, ts, score) VALUES (?, ?, ?)",
+        (player_name, ts, score)
+    )
+    conn.executemany('''
+        INSERT INTO score_rollups
+            (player, resolution, bucket, score_min, score_max, score_last, last_ts)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (player, resolution, bucket) DO UPDATE SET
+            score_min = MIN(score_min, excluded.score_min),
+            score_max = MAX(score_max, excluded.score_max),
+            score_last = excluded.score_last,
+            last_ts = excluded.last_ts
+    ''', [
+        (player_name, seconds, ts - ts % seconds, score, score, score, ts)
+        for seconds in HISTORY_ROLLUPS.values()
+    ])
+
+def sample_ranks():
+    """Write ranks that changed since the last sample into the current rollup buckets.
+
+    Ranks come from the cached leaderboard, so history uses the same
+    ordering as the board. Runs off the request path in small transactions.
+    """
+    leaderboard = get_leaderboard_data()
+    if leaderboard is not leaderboard_cache['data']:
+        return  # Placeholder data from an error path, nothing to sample
+
+    conn = get_db_connection()
+    if not conn:
+        return
+
+    try:
+        last = rank_sampler['last']
+        if last is None:
+            # After a restart, start from the latest stored rank per player
+            # (day buckets are the fewest rows) instead of rewriting them all
+            last = {row[0]: row[1] for row in conn.execute('''
+                SELECT player, rank_last, MAX(bucket) FROM score_rollups
+                WHERE resolution = ? AND rank_last IS NOT NULL
+                GROUP BY player
+            ''', (HISTORY_ROLLUPS['day'],)).fetchall()}
+
+        changed = [player for player in leaderboard if last.get(player['name']) != player['rank']]
+        if not changed:
+            rank_sampler['last'] = {player['name']: player['rank'] for player in leaderboard}
+            return
+
+        ts = int(time.time())
+        chunk_size = rank_sampler['chunk_size']
+        for start in range(0, len(changed), chunk_size):
+            conn.executemany('''
+                INSERT INTO score_rollups
+                    (player, resolution, bucket, score_min, score_max, score_last, last_ts, rank_best, rank_last)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (player, resolution, bucket) DO UPDATE SET
+                    rank_best = MIN(COALESCE(rank_best, excluded.rank_best), excluded.rank_best),
+                    rank_last = excluded.rank_last
+            ''', [
+                (player['name'], seconds, ts - ts % seconds,
+                 player['score'], player['score'], player['score'], ts, player['rank'], player['rank'])
+                for seconds in HISTORY_ROLLUPS.values()
+                for player in changed[start:start + chunk_size]
+            ])
+            # Commit per chunk so score updates never wait behind a large sample
+            conn.commit()
+        # Only advance once written, so a failed sample is retried next time
+        rank_sampler['last'] = {player['name']: player['rank'] for player in leaderboard}
+    finally:
+        conn.close()
+
+def _pick_history_resolution(since, until):
+    """Finest resolution that keeps the range within HISTORY_MAX_POINTS"""
+    span = max(0, until - since)
+    if span <= HISTORY_MAX_POINTS:
+        return 'raw'
+    for name, seconds in sorted(HISTORY_ROLLUPS.items(), key=lambda item: item[1]):
+        if span / seconds <= HISTORY_MAX_POINTS:
+            return name
+    return 'day'
+
+def _rank_samples(conn, player_name, seconds, since, until):
+    """Sorted (bucket, rank_last) samples in range, plus the last sample before it"""
+    before = conn.execute('''
+        SELECT bucket, rank_last FROM score_rollups
+        WHERE player = ? AND resolution = ? AND bucket < ? AND rank_last IS NOT NULL
+        ORDER BY bucket DESC LIMIT 1
+    ''', (player_name, seconds, since)).fetchall()
+    rows = conn.execute('''
+        SELECT bucket, rank_last FROM score_rollups
+        WHERE player = ? AND resolution = ? AND bucket BETWEEN ? AND ? AND rank_last IS NOT NULL
+        ORDER BY bucket
+    ''', (player_name, seconds, since, until)).fetchall()
+    return [(row[0], row[1]) for row in before + rows]
+
+def _rank_at(samples, t):
+    """Most recent sampled rank at or before t (samples are only written on change)"""
+    pos = bisect.bisect_right(samples, (t, float('inf')))
+    return samples[pos - 1][1] if pos else None
+
+def get_player_history(conn, player_name, resolution, since, until):
+    """Return (points, truncated) for a player between since and until (epoch seconds).
+
+    At most HISTORY_MAX_POINTS points are returned, keeping the newest;
+    truncated is True when older points in the range were left out.
+    Leaderboard resets appear as points with score 0 and 'reset': True.
+    """
+    seconds = HISTORY_ROLLUPS.get(resolution, HISTORY_ROLLUPS['minute'])
+    start = since - since % seconds
+    resets = [row[0] for row in conn.execute(
+        "SELECT ts FROM leaderboard_resets WHERE ts BETWEEN ? AND ? ORDER BY ts", (start, until)
+    ).fetchall()]
+    # Raw points take their rank from the minute samples
+    samples = _rank_samples(conn, player_name, seconds, start, until)
+
+    if resolution == 'raw':
+        # Most recent points first in SQL so LIMIT keeps the newest, then re-order.
+        # One extra row tells us whether the range was cut short.
+        rows = conn.execute('''
+            SELECT ts, score FROM score_events
+            WHERE player = ? AND ts BETWEEN ? AND ?
+            ORDER BY ts DESC LIMIT ?
+        ''', (player_name, since, until, HISTORY_MAX_POINTS + 1)).fetchall()
+        points = [{'t': row['ts'], 'score': row['score']} for row in rows]
+        points += [{'t': ts, 'score': 0, 'reset': True} for ts in resets if ts >= since]
+        for point in points:
+            point['rank'] = None if point.get('reset') else _rank_at(samples, point['t'])
+    else:
+        rows = conn.execute('''
+            SELECT bucket, score_min, score_max, score_last, last_ts, rank_best, rank_last FROM score_rollups
+            WHERE player = ? AND resolution = ? AND bucket BETWEEN ? AND ?
+            ORDER BY bucket DESC LIMIT ?
+        ''', (player_name, seconds, start, until, HISTORY_MAX_POINTS + 1)).fetchall()
+        points = []
+        buckets = set()
+        for row in rows:
+            score_last, score_min = row['score_last'], row['score_min']
+            # A reset after the bucket's last score leaves the player at 0
+            if any(row['last_ts'] < ts < row['bucket'] + seconds for ts in resets):
+                score_last, score_min = 0, min(score_min, 0)
+            rank = row['rank_last'] if row['rank_last'] is not None else _rank_at(samples, row['bucket'])
+            points.append({
+                't': row['bucket'],
+                'score': score_last,
+                'rank': rank,
+                'score_min': score_min,
+                'score_max': row['score_max'],
+                'rank_best': row['rank_best'] if row['rank_best'] is not None else rank
+            })
+            buckets.add(row['bucket'])
+        for ts in resets:
+            bucket = ts - ts % seconds
+            if bucket not in buckets:
+                buckets.add(bucket)
+                points.append({'t': bucket, 'score': 0, 'rank': None,
+                               'score_min': 0, 'score_max': 0, 'rank_best': None, 'reset': True})
+
+    points.sort(key=lambda point: point['t'])
+    truncated = len(points) > HISTORY_MAX_POINTS
+    return points[-HISTORY_MAX_POINTS:], truncated
+
 def get_db_connection():
     """Get database connection with proper error handling"""
     try:
@@ -172,6 +458,108 @@ def _get_current_player_names_from_db():
     finally:
         conn.close()
 
+# === PLAYER SEARCH INDEX ===
+
+def _name_trigrams(text):
+    """Trigrams of a lowercase string, padded so short names still index"""
+    padded = f"${text}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _index_add(name):
+    key = name.lower()
+    entry = (key, name)
+    keys = player_search_index['sorted_keys']
+    pos = bisect.bisect_left(keys, entry)
+    if pos < len(keys) and keys[pos] == entry:
+        return
+    keys.insert(pos, entry)
+    for gram in _name_trigrams(key):
+        player_search_index['grams'].setdefault(gram, set()).add(name)
+
+def _index_remove(name):
+    key = name.lower()
+    entry = (key, name)
+    keys = player_search_index['sorted_keys']
+    pos = bisect.bisect_left(keys, entry)
+    if pos < len(keys) and keys[pos] == entry:
+        del keys[pos]
+    grams = player_search_index['grams']
+    for gram in _name_trigrams(key):
+        names = grams.get(gram)
+        if names is not None:
+            names.discard(name)
+            if not names:
+                del grams[gram]
+
+def update_player_search_index(added=(), removed=()):
+    """Apply an incremental sync diff to the search index"""
+    with player_search_index['lock']:
+        if not player_search_index['ready']:
+            return  # Built from the database on first search
+        for name in removed:
+            _index_remove(name)
+        for name in added:
+            _index_add(name)
+
+def _ensure_player_search_index():
+    """Build the index from the database the first time it is needed"""
+    with player_search_index['lock']:
+        if player_search_index['ready']:
+            return
+        # Read under the lock so a concurrent sync diff is applied after the build.
+        # On failure the index stays not ready and the next search retries.
+        conn = get_db_connection()
+        if not conn:
+            return
+        try:
+            names = [row['name'] for row in conn.execute("SELECT name FROM players").fetchall()]
+        except Exception as e:
+            print(f"Error building player search index: {e}")
+            return
+        finally:
+            conn.close()
+        player_search_index['sorted_keys'] = []
+        player_search_index['grams'] = {}
+        for name in names:
+            _index_add(name)
+        player_search_index['ready'] = True
+        print(f"Player search index built, {len(names)} players")
+
+def search_player_names(query, min_similarity=0.5):
+    """Return player names matching query: prefix matches first, then fuzzy matches by similarity"""
+    _ensure_player_search_index()
+    query = query.strip().lower()
+
+    with player_search_index['lock']:
+        keys = player_search_index['sorted_keys']
+        if not query:
+            return [name for _, name in keys]
+
+        prefix_matches = []
+        pos = bisect.bisect_left(keys, (query,))
+        while pos < len(keys) and keys[pos][0].startswith(query):
+            prefix_matches.append(keys[pos][1])
+            pos += 1
+
+        # Fuzzy matching counts shared trigrams; unpadded so substrings match too
+        query_grams = {query[i:i + 3] for i in range(len(query) - 2)}
+        if not query_grams:
+            return prefix_matches
+
+        hits = {}
+        grams = player_search_index['grams']
+        for gram in query_grams:
+            for name in grams.get(gram, ()):
+                hits[name] = hits.get(name, 0) + 1
+
+    seen = set(prefix_matches)
+    threshold = min_similarity * len(query_grams)
+    fuzzy_matches = sorted(
+        (name for name, count in hits.items() if count >= threshold and name not in seen),
+        key=lambda name: (-hits[name], name.lower())
+    )
+    return prefix_matches + fuzzy_matches
+
 def sync_users_from_api():
     with sync_control['lock']:
         if not sync_control['enabled']:
@@ -215,12 +603,17 @@ def sync_users_from_api():
                 )
                 created_count += 1
 
-            # Delete players no longer present in API
+            # Delete players no longer present in API, along with their history
             for username in to_delete:
                 conn.execute("DELETE FROM players WHERE name = ?", (username,))
+                conn.execute("DELETE FROM score_events WHERE player = ?", (username,))
+                conn.execute("DELETE FROM score_rollups WHERE player = ?", (username,))
                 deleted_count += 1
 
             conn.commit()
+            if to_create or to_delete:
+                mark_database_write()
+            update_player_search_index(added=to_create, removed=to_delete)
             sync_control['last_sync'] = time.time()
             print(f"Synced users. Created {created_count}, deleted {deleted_count}. Total API users: {len(api_set)}")
 
@@ -261,7 +654,7 @@ def get_leaderboard_data():
             
             try:
                 cursor = conn.execute(
-                    "SELECT name, score FROM players ORDER BY score DESC"
+                    "SELECT name, score FROM players ORDER BY score DESC, name"
                 )
                 players = cursor.fetchall()
                 
@@ -282,6 +675,7 @@ def get_leaderboard_data():
                 
                 # Update cache
                 leaderboard_cache['data'] = leaderboard
+                leaderboard_cache['by_name'] = {player['name']: player for player in leaderboard}
                 leaderboard_cache['timestamp'] = now
                 
                 print(f"Fresh leaderboard data fetched, {len(leaderboard)} players")
@@ -300,6 +694,132 @@ def get_leaderboard_data():
             # Ultimate fallback
             return [{'rank': 1, 'name': 'Service Error', 'score': 0}]
 
+def get_leaderboard_with_ranks():
+    """Return the leaderboard and its name -> entry map from the same snapshot"""
+    leaderboard = get_leaderboard_data()
+    with leaderboard_cache['lock']:
+        # Both are assigned under the lock, so they match while it is held
+        if leaderboard is leaderboard_cache['data']:
+            return leaderboard, leaderboard_cache['by_name']
+    return leaderboard, {player['name']: player for player in leaderboard}
+
+def get_fresh_cached_leaderboard():
+    """Return the cached leaderboard if it is within its TTL, else None"""
+    data, timestamp = leaderboard_cache['data'], leaderboard_cache['timestamp']
+    if data and timestamp and (datetime.now() - timestamp).total_seconds() < leaderboard_cache['ttl']:
+        return data
+    return None
+
+def get_cached_leaderboard_snapshot():
+    """Return the last cached leaderboard without waiting on the cache lock"""
+    return leaderboard_cache['data']
+
+# === PUBLIC ENDPOINT RATE LIMITING ===
+
+def _client_key():
+    """Identify the caller by a configured API key, otherwise by the proxy-reported address"""
+    api_key = request.headers.get('X-API-Key')
+    if api_key and api_key in PUBLIC_API_KEYS:
+        return f"key:{api_key}"
+    # remote_addr is the address added by the trusted proxy (see ProxyFix)
+    return f"ip:{request.remote_addr}"
+
+def consume_client_token(client_key):
+    """Take a token from the client's bucket. Returns seconds to wait, or 0 if allowed"""
+    capacity = client_rate_limiter['capacity']
+    refill_rate = client_rate_limiter['refill_rate']
+    buckets = client_rate_limiter['buckets']
+
+    with client_rate_limiter['lock']:
+        now = time.monotonic()
+        bucket = buckets.get(client_key)
+        if bucket is None:
+            bucket = [capacity, now]
+            buckets[client_key] = bucket
+            # Evict least recently seen clients to keep the table bounded
+            while len(buckets) > client_rate_limiter['max_clients']:
+                buckets.popitem(last=False)
+        else:
+            buckets.move_to_end(client_key)
+            bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * refill_rate)
+            bucket[1] = now
+
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0
+        return (1 - bucket[0]) / refill_rate
+
+def _too_many_requests(retry_after, as_json):
+    retry_after = max(1, math.ceil(retry_after))
+    if as_json:
+        response = jsonify({'error': 'Too many requests', 'retry_after': retry_after})
+    else:
+        response = app.response_class('Too many requests, please retry shortly.', mimetype='text/plain')
+    response.status_code = 429
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+def check_client_rate_limit(as_json=True):
+    """Return a 429 response if the caller is over its rate limit, else None"""
+    retry_after = consume_client_token(_client_key())
+    if retry_after:
+        return _too_many_requests(retry_after, as_json)
+    return None
+
+def admit_request():
+    """Count a request as in flight unless the process is saturated. Returns False if shed"""
+    with load_shedding['lock']:
+        if load_shedding['inflight'] >= load_shedding['max_inflight']:
+            return False
+        load_shedding['inflight'] += 1
+        return True
+
+def release_request():
+    """Counterpart to admit_request, called once the request is done"""
+    with load_shedding['lock']:
+        load_shedding['inflight'] -= 1
+
+def rate_limited_endpoint(as_json=True):
+    """Throttle a public endpoint per client and shed load under overload.
+
+    The wrapped view receives a ``leaderboard`` keyword argument: fresh data
+    normally, or the cached snapshot when the process is saturated. Clients
+    over their budget still get the cached leaderboard while it is fresh,
+    since many viewers can share one address (e.g. a venue NAT).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            limited = check_client_rate_limit(as_json)
+            if limited:
+                snapshot = get_fresh_cached_leaderboard()
+                if snapshot is None:
+                    return limited
+                return view(*args, leaderboard=snapshot, **kwargs)
+
+            if not admit_request():
+                snapshot = get_cached_leaderboard_snapshot()
+                if snapshot is None:
+                    return _too_many_requests(load_shedding['retry_after'], as_json)
+                print("Overloaded, serving cached leaderboard snapshot")
+                return view(*args, leaderboard=snapshot, **kwargs)
+
+            try:
+                return view(*args, leaderboard=get_leaderboard_data(), **kwargs)
+            finally:
+                release_request()
+        return wrapper
+    return decorator
+
+def background_rank_sampler():
+    """Background thread for sampling ranks into score history every minute"""
+    while True:
+        try:
+            sample_ranks()
+        except Exception as e:
+            print(f"Error in rank sampler: {e}")
+        time.sleep(rank_sampler['interval'])
+
 def background_sync():
     """Background thread for syncing users from API every 3 seconds"""
     while True:
@@ -311,12 +831,168 @@ def background_sync():
             print(f"Error in background sync: {e}")
             time.sleep(sync_control['interval'])
 
+# === DATABASE MAINTENANCE ===
+
+def mark_database_write():
+    """Note a write so maintenance waits for the next quiet period"""
+    maintenance_control['last_write'] = time.time()
+
+def reset_player_scores(conn):
+    """Reset every score to 0 by swapping in a freshly built players table.
+
+    The replacement is bulk-loaded and indexed in one transaction, so readers
+    keep seeing the old table until the commit and no row is updated in place.
+    The dropped table's pages are reclaimed later by maintenance.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("DROP TABLE IF EXISTS players_next")
+        conn.execute('''
+            CREATE TABLE players_next (
+                name TEXT PRIMARY KEY,
+                score INTEGER DEFAULT 0,
+                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.execute("INSERT INTO players_next (name) SELECT name FROM players ORDER BY name")
+        conn.execute("DROP TABLE players")
+        conn.execute("ALTER TABLE players_next RENAME TO players")
+        conn.execute("CREATE INDEX idx_score ON players(score DESC)")
+        # A single marker; history reads turn it into every score dropping to 0
+        conn.execute("INSERT OR IGNORE INTO leaderboard_resets (ts) VALUES (?)", (int(time.time()),))
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+def _is_quiet():
+    """True when nothing has been written recently and no public request is in flight"""
+    idle_for = time.time() - maintenance_control['last_write']
+    return idle_for >= maintenance_control['quiet_period'] and load_shedding['inflight'] == 0
+
+def _is_due(task, interval):
+    last_run = maintenance_control['last_run'].get(task)
+    return last_run is None or time.time() - last_run >= interval
+
+class BackupInterrupted(Exception):
+    """Raised from the backup progress callback when activity resumes"""
+
+def _backup_progress(status, remaining, total):
+    # Called after every step: pause so the source is never held for long,
+    # and give up as soon as the app stops being quiet
+    if not _is_quiet():
+        raise BackupInterrupted(f"{remaining} of {total} pages left")
+    time.sleep(maintenance_control['backup_sleep'])
+
+def run_online_backup():
+    """Copy the live database to BACKUP_PATH with the sqlite3 backup API.
+
+    Pages are copied in small steps with a pause after each one, and the
+    backup is abandoned if writes or requests resume. The copy goes to a
+    temporary file and replaces the previous backup only once complete.
+    """
+    tmp_path = f"{BACKUP_PATH}.tmp"
+    replaced = False
+    source = sqlite3.connect(DATABASE_PATH, check_same_thread=False)
+    try:
+        target = sqlite3.connect(tmp_path)
+        try:
+            source.backup(
+                target,
+                pages=maintenance_control['backup_pages'],
+                progress=_backup_progress
+            )
+        finally:
+            target.close()
+        os.replace(tmp_path, BACKUP_PATH)
+        replaced = True
+    except BackupInterrupted as e:
+        print(f"Online backup interrupted by activity ({e}), will retry when quiet")
+        return False
+    finally:
+        source.close()
+        # Never leave a partial copy behind, whatever stopped the backup
+        if not replaced and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    print(f"Online backup written to {BACKUP_PATH}")
+    return True
+
+def run_wal_checkpoint(conn):
+    """Passive checkpoint: copies what it can without waiting on readers or writers"""
+    conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+
+def run_analyze(conn):
+    """Refresh query planner statistics, sampling a bounded number of rows per index"""
+    conn.execute("PRAGMA analysis_limit = 1000")
+    conn.execute("ANALYZE")
+
+def run_compaction(conn):
+    """Reclaim free pages a few at a time (see initialize_database for the one-time conversion)"""
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:  # INCREMENTAL
+        return
+    # executescript steps the pragma to completion; execute() frees only one page
+    conn.executescript(f"PRAGMA incremental_vacuum({int(maintenance_control['vacuum_pages'])})")
+
+def run_maintenance_tasks():
+    """Run each due maintenance task, stopping as soon as activity resumes"""
+    tasks = [
+        ('checkpoint', maintenance_control['checkpoint_interval'], run_wal_checkpoint),
+        ('compaction', maintenance_control['vacuum_interval'], run_compaction),
+        ('analyze', maintenance_control['analyze_interval'], run_analyze),
+    ]
+    if BACKUP_PATH:
+        tasks.append(('backup', maintenance_control['backup_interval'], None))
+
+    with maintenance_control['lock']:
+        for task, interval, run in tasks:
+            if not _is_quiet():
+                return
+            if not _is_due(task, interval):
+                continue
+            try:
+                if run is None:
+                    if not run_online_backup():
+                        return
+                else:
+                    conn = get_db_connection()
+                    if not conn:
+                        return
+                    try:
+                        run(conn)
+                    finally:
+                        conn.close()
+                maintenance_control['last_run'][task] = time.time()
+            except Exception as e:
+                print(f"Maintenance task '{task}' failed: {e}")
+
+def background_maintenance():
+    """Background thread for checkpoints, compaction, statistics and backups"""
+    while True:
+        try:
+            run_maintenance_tasks()
+        except Exception as e:
+            print(f"Error in background maintenance: {e}")
+        time.sleep(maintenance_control['check_interval'])
+
 # Start background sync thread with reduced frequency
 if not os.environ.get('TESTING'):
     sync_thread = threading.Thread(target=background_sync, daemon=True)
     sync_thread.start()
     print(f"Background sync thread started (interval: {sync_control['interval']}s)")
 
+    rank_thread = threading.Thread(target=background_rank_sampler, daemon=True)
+    rank_thread.start()
+    print(f"Background rank sampler started (interval: {rank_sampler['interval']}s)")
+
+    if not BACKUP_PATH:
+        print("WARNING: BACKUP_PATH is not set, online backups are disabled")
+    elif os.path.dirname(os.path.abspath(BACKUP_PATH)) == os.path.dirname(os.path.abspath(DATABASE_PATH)):
+        print(f"WARNING: BACKUP_PATH ({BACKUP_PATH}) is next to DATABASE_PATH and will be lost with it")
+
+    maintenance_thread = threading.Thread(target=background_maintenance, daemon=True)
+    maintenance_thread.start()
+    print(f"Background maintenance thread started (backup: {BACKUP_PATH or 'disabled'})")
+
 # === Flask Routes ===
 
 @app.route('/')
@@ -329,7 +1005,11 @@ def admin():
         return redirect(url_for('login'))
     
     leaderboard = get_leaderboard_data()
-    return render_template('admin.html', leaderboard=leaderboard)
+    return render_template(
+        'admin.html',
+        total_players=len(leaderboard),
+        top_score=leaderboard[0]['score'] if leaderboard else 0
+    )
 
 @app.route('/login', methods=['GET', 'POST'])
 def login():
@@ -379,7 +1059,9 @@ def update_score():
                 "UPDATE players SET score = score + ?, last_updated = CURRENT_TIMESTAMP WHERE name = ?",
                 (score_change, player_name)
             )
+            record_score_event(conn, player_name)
             conn.commit()
+            mark_database_write()
             
             # Invalidate cache to force refresh
             with leaderboard_cache['lock']:
@@ -399,16 +1081,106 @@ def get_leaderboard():
     leaderboard = get_leaderboard_data()
     return jsonify(leaderboard)
 
+@app.route('/api/players/search')
+def search_players():
+    """Paginated player search for the admin panel"""
+    if 'admin' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    query = request.args.get('q', '')
+    try:
+        page = max(1, int(request.args.get('page', 1)))
+        per_page = min(100, max(1, int(request.args.get('per_page', 25))))
+    except ValueError:
+        return jsonify({'error': 'page and per_page must be integers'}), 400
+
+    leaderboard, by_name = get_leaderboard_with_ranks()
+
+    if query.strip():
+        names = search_player_names(query)
+    else:
+        # No query: page through the leaderboard in rank order
+        names = [player['name'] for player in leaderboard]
+
+    start = (page - 1) * per_page
+    results = []
+    for name in names[start:start + per_page]:
+        player = by_name.get(name)
+        results.append({
+            'rank': player['rank'] if player else None,
+            'name': name,
+            'score': player['score'] if player else 0
+        })
+
+    return jsonify({
+        'query': query,
+        'page': page,
+        'per_page': per_page,
+        'total': len(names),
+        'total_players': len(leaderboard),
+        'top_score': leaderboard[0]['score'] if leaderboard else 0,
+        'results': results
+    })
+
 @app.route('/api/leaderboard')
-def api_leaderboard():
+@rate_limited_endpoint(as_json=True)
+def api_leaderboard(leaderboard):
     """Public API endpoint for leaderboard data"""
-    leaderboard = get_leaderboard_data()
     return jsonify(leaderboard)
 
+@app.route('/api/player/<path:player_name>/history')
+def player_history(player_name):
+    """Public score and rank trajectory for a player, downsampled to the requested resolution"""
+    limited = check_client_rate_limit(as_json=True)
+    if limited:
+        return limited
+
+    now = int(time.time())
+    try:
+        until = int(request.args.get('until', now))
+        since = int(request.args.get('since', until - 86400))
+    except ValueError:
+        return jsonify({'error': 'since and until must be epoch seconds'}), 400
+
+    resolution = request.args.get('resolution', 'auto')
+    if resolution == 'auto':
+        resolution = _pick_history_resolution(since, until)
+    elif resolution != 'raw' and resolution not in HISTORY_ROLLUPS:
+        valid = ', '.join(['auto', 'raw'] + list(HISTORY_ROLLUPS))
+        return jsonify({'error': f'resolution must be one of: {valid}'}), 400
+
+    # History has no cached fallback, so shed it outright under overload
+    if not admit_request():
+        return _too_many_requests(load_shedding['retry_after'], as_json=True)
+
+    try:
+        conn = get_db_connection()
+        if not conn:
+            return jsonify({'error': 'Database connection failed'}), 500
+
+        try:
+            points, truncated = get_player_history(conn, player_name, resolution, since, until)
+        finally:
+            conn.close()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
+        release_request()
+
+    return jsonify({
+        'player': player_name,
+        'resolution': resolution,
+        # When truncated, report where the returned points actually start
+        'since': points[0]['t'] if truncated else since,
+        'until': until,
+        'truncated': truncated,
+        'points': points
+    })
+
 @app.route('/public_leaderboard')
-def public_leaderboard():
+@rate_limited_endpoint(as_json=False)
+def public_leaderboard(leaderboard):
     """Public leaderboard view (no login required)"""
-    leaderboard = get_leaderboard_data()
     return render_template('public_leaderboard.html', leaderboard=leaderboard)
 
 @app.route('/health')
@@ -424,7 +1196,10 @@ def health():
         'cache_age': cache_age,
         'sync_enabled': sync_control['enabled'],
         'database': 'SQLite',
-        'sync_interval': sync_control['interval']
+        'sync_interval': sync_control['interval'],
+        'inflight_requests': load_shedding['inflight'],
+        'last_backup': maintenance_control['last_run'].get('backup'),
+        'tracked_clients': len(client_rate_limiter['buckets'])
     })
 
 @app.route('/admin/toggle_sync', methods=['POST'])
@@ -459,9 +1234,9 @@ def reset_leaderboard():
             return jsonify({'error': 'Database connection failed'}), 500
         
         try:
-            # Reset all scores to 0
-            conn.execute("UPDATE players SET score = 0, last_updated = CURRENT_TIMESTAMP")
-            conn.commit()
+            # Reset all scores to 0 with an atomic table swap
+            reset_player_scores(conn)
+            mark_database_write()
             
             # Invalidate cache to force refresh
             with leaderboard_cache['lock']:
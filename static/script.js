@@ -3,16 +3,25 @@ let previousLeaderboard = [];
 let isAnimating = false;
 let updateInterval = 3000; // 3 seconds for real-time updates
 let failureCount = 0;
+let retryAfterMs = 0; // Server-requested delay from a 429 Retry-After header
+
+// Only the public leaderboard pages show (and poll) the full leaderboard
+function isLeaderboardPage() {
+    return window.location.pathname === '/public_leaderboard' || 
+        window.location.pathname === '/';
+}
 
 // Auto-refresh leaderboard with adaptive intervals
 function startAutoRefresh() {
-    setInterval(() => {
-        if (window.location.pathname === '/public_leaderboard' || 
-            window.location.pathname === '/' || 
-            window.location.pathname === '/admin') {
-            fetchLeaderboardData();
+    // Re-arm after each poll so back-off and Retry-After take effect
+    const delay = Math.max(updateInterval, retryAfterMs);
+    retryAfterMs = 0;
+    setTimeout(async () => {
+        if (isLeaderboardPage()) {
+            await fetchLeaderboardData();
         }
-    }, updateInterval);
+        startAutoRefresh();
+    }, delay);
 }
 
 // Start auto-refresh on page load
@@ -31,7 +40,9 @@ document.addEventListener('DOMContentLoaded', function() {
     addLoadingIndicator();
     
     // Fetch initial data
-    fetchLeaderboardData();
+    if (isLeaderboardPage()) {
+        fetchLeaderboardData();
+    }
 });
 
 // Fetch leaderboard data and animate changes with error handling
@@ -49,6 +60,14 @@ async function fetchLeaderboardData() {
         
         clearTimeout(timeoutId);
         
+        if (response.status === 429) {
+            // Server is throttling us - wait as long as it asks, keep last data
+            const retryAfter = parseInt(response.headers.get('Retry-After'), 10);
+            retryAfterMs = (isNaN(retryAfter) ? updateInterval / 1000 : retryAfter) * 1000;
+            hideLoading();
+            return;
+        }
+        
         if (!response.ok) {
             throw new Error(`HTTP ${response.status}: ${response.statusText}`);
         }